@@ -4,8 +4,12 @@ OLC Prototype menu nodes
 
 """
 
-import json
 import re
+import time
+import hashlib
+from collections import OrderedDict
+from copy import deepcopy
+from functools import lru_cache, partial
 from random import choice
 from django.db.models import Q
 from django.conf import settings
@@ -25,6 +29,10 @@ from evennia.prototypes import spawner
 # ------------------------------------------------------------
 
 _MENU_CROP_WIDTH = 15
+_VALIDATION_CACHE_SIZE = 128
+_PROTOTYPE_CACHE_SIZE = 32
+_PROTOTYPE_CACHE_TIMEOUT = 60
+_UPDATE_BATCH_SIZE = 500
 _MENU_ATTR_LITERAL_EVAL_ERROR = (
     "|rCritical Python syntax error in your value. Only primitive Python structures are allowed.\n"
     "You also need to use correct Python syntax. Remember especially to put quotes around all "
@@ -37,23 +45,21 @@ _MENU_ATTR_LITERAL_EVAL_ERROR = (
 
 def _get_menu_prototype(caller):
     """Return currently active menu prototype."""
-    prototype = None
-    if hasattr(caller.ndb._menutree, "olc_prototype"):
-        prototype = caller.ndb._menutree.olc_prototype
+    menutree = caller.ndb._menutree
+    prototype = getattr(menutree, "olc_prototype", None)
     if not prototype:
-        caller.ndb._menutree.olc_prototype = prototype = {}
-        caller.ndb._menutree.olc_new = True
+        menutree.olc_prototype = prototype = {}
+        menutree.olc_new = True
     return prototype
 
 
 def _get_flat_menu_prototype(caller, refresh=False, validate=False):
     """Return prototype where parent values are included"""
-    flat_prototype = None
-    if not refresh and hasattr(caller.ndb._menutree, "olc_flat_prototype"):
-        flat_prototype = caller.ndb._menutree.olc_flat_prototype
+    menutree = caller.ndb._menutree
+    flat_prototype = None if refresh else getattr(menutree, "olc_flat_prototype", None)
     if not flat_prototype:
         prot = _get_menu_prototype(caller)
-        caller.ndb._menutree.olc_flat_prototype = flat_prototype = spawner.flatten_prototype(
+        menutree.olc_flat_prototype = flat_prototype = spawner.flatten_prototype(
             prot, validate=validate
         )
     return flat_prototype
@@ -83,6 +89,104 @@ def _is_new_prototype(caller):
     return hasattr(caller.ndb._menutree, "olc_new")
 
 
+def _cached_search_prototype(caller, key=None):
+    """
+    Search for prototypes, re-using earlier results from this menu session.
+
+    Args:
+        caller (Object or Account): The user of the menu.
+        key (str, optional): The prototype-key to search for. If not given, all available
+            prototypes are returned.
+
+    Returns:
+        matches (list): The result of `protlib.search_prototype(key)`.
+
+    Notes:
+        The cache is stored on the menu and is cleared whenever a prototype is saved or deleted.
+        Since prototypes may also be changed by others, results are re-fetched once they are
+        older than `_PROTOTYPE_CACHE_TIMEOUT` seconds. Only the `_PROTOTYPE_CACHE_SIZE` most
+        recently used searches are kept. The returned prototypes are shared with the cache and
+        should not be modified in-place.
+
+    """
+    cache = getattr(caller.ndb._menutree, "olc_proto_cache", None)
+    if cache is None:
+        cache = caller.ndb._menutree.olc_proto_cache = OrderedDict()
+    now = time.monotonic()
+    cached = cache.get(key)
+    if cached and now - cached[0] < _PROTOTYPE_CACHE_TIMEOUT:
+        cache.move_to_end(key)
+        return cached[1]
+    matches = protlib.search_prototype(key)
+    cache[key] = (now, matches)
+    cache.move_to_end(key)
+    if len(cache) > _PROTOTYPE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return matches
+
+
+def _clear_prototype_cache(caller):
+    """Clear the prototype-search cache, such as after the stored prototypes changed."""
+    caller.ndb._menutree.olc_proto_cache = OrderedDict()
+    # validation may depend on stored prototype-parents
+    caller.ndb._menutree.olc_validation_cache = OrderedDict()
+
+
+def _get_entry_index(caller, field):
+    """
+    Get the entries of a prototype field storing named tuples (like `attrs` or `tags`), along
+    with a mapping of each name to its position in the list.
+
+    Args:
+        caller (Object or Account): The user of the menu.
+        field (str): The prototype field to index. Each entry is a tuple starting with its name.
+
+    Returns:
+        entries (list): The entries of the field. If the field is not set, this is a new, empty
+            list which must be stored with `_set_prototype_value` if it is modified.
+        index (dict): A mapping `{name: position, ...}`. If a name is repeated, the first
+            position is used.
+
+    Notes:
+        The index is cached on the menu and re-used for as long as the prototype keeps the same
+        list. It must be kept up to date by those modifying the list, or be discarded with
+        `_clear_entry_index` when positions shift.
+
+    """
+    entries = _get_menu_prototype(caller).get(field)
+    indices = getattr(caller.ndb._menutree, "olc_entry_index", None)
+    if indices is None:
+        indices = caller.ndb._menutree.olc_entry_index = {}
+    if entries is not None and field in indices and indices[field][0] is entries:
+        return indices[field]
+    if entries is None:
+        entries = []
+    index = {}
+    for ind, tup in enumerate(entries):
+        index.setdefault(tup[0], ind)
+    indices[field] = (entries, index)
+    return entries, index
+
+
+def _clear_entry_index(caller, field):
+    """Discard the cached index of a prototype field, it will be rebuilt on next access."""
+    getattr(caller.ndb._menutree, "olc_entry_index", {}).pop(field, None)
+
+
+def _store_entries(caller, field, entries):
+    """
+    Store entries from `_get_entry_index` after they were modified. If the prototype already holds
+    this list it was modified in-place and there is nothing more to do.
+
+    """
+    if _get_menu_prototype(caller).get(field) is not entries:
+        _set_prototype_value(caller, field, entries)
+
+
+_menu_cropper = partial(utils.crop, width=_MENU_CROP_WIDTH)
+_ITER_TYPES = (list, tuple, set, frozenset)
+
+
 def _format_option_value(prop, required=False, prototype=None, cropper=None):
     """
     Format wizard option values.
@@ -99,26 +203,32 @@ def _format_option_value(prop, required=False, prototype=None, cropper=None):
     if prototype is not None:
         prop = prototype.get(prop, "")
 
-    out = prop
-    if callable(prop):
-        if hasattr(prop, "__name__"):
-            out = "<{}>".format(prop.__name__)
-        else:
-            out = repr(prop)
-    if utils.is_iter(prop):
+    typ = type(prop)
+    if typ is str:
+        out = prop
+    elif typ in _ITER_TYPES:
+        out = ", ".join(map(str, prop))
+    elif callable(prop):
+        out = "<{}>".format(prop.__name__) if hasattr(prop, "__name__") else repr(prop)
+    elif utils.is_iter(prop):
         out = ", ".join(str(pr) for pr in prop)
-    if not out and required:
-        out = "|runset"
-    if out:
-        return " ({}|n)".format(cropper(out) if cropper else utils.crop(out, _MENU_CROP_WIDTH))
-    return ""
+    else:
+        out = prop
+
+    if not out:
+        return " (|runset|n)" if required else ""
+    out = str(out)
+    if (cropper is None or cropper is _menu_cropper) and len(out) <= _MENU_CROP_WIDTH:
+        # fits without cropping
+        return " ({}|n)".format(out)
+    return " ({}|n)".format((cropper or _menu_cropper)(out))
 
 
 def _set_prototype_value(caller, field, value, parse=True):
     """Set prototype's field in a safe way."""
     prototype = _get_menu_prototype(caller)
+    # the prototype is already stored on the menu, so it's enough to update it in-place
     prototype[field] = value
-    caller.ndb._menutree.olc_prototype = prototype
     return prototype
 
 
@@ -164,16 +274,9 @@ def _set_property(caller, raw_string, **kwargs):
     if not value:
         return next_node
 
-    prototype = _set_prototype_value(caller, prop, value)
-    caller.ndb._menutree.olc_prototype = prototype
-
-    try:
-        # TODO simple way to get rid of the u'' markers in list reprs, remove this when on py3.
-        repr_value = json.dumps(value)
-    except Exception:
-        repr_value = value
+    _set_prototype_value(caller, prop, value)
 
-    out = [" Set {prop} to {value} ({typ}).".format(prop=prop, value=repr_value, typ=type(value))]
+    out = [" Set {prop} to {value!r} ({typ}).".format(prop=prop, value=value, typ=type(value))]
 
     if kwargs.get("test_parse", True):
         out.append(" Simulating prototype-func parsing ...")
@@ -192,8 +295,9 @@ def _set_property(caller, raw_string, **kwargs):
     return next_node
 
 
-def _wizard_options(curr_node, prev_node, next_node, color="|W", search=False):
-    """Creates default navigation options available in the wizard."""
+@lru_cache(maxsize=64)
+def _wizard_options_cached(curr_node, prev_node, next_node, color, search):
+    """Build the navigation options for a given node combination. Don't modify the result."""
     options = []
     if prev_node:
         options.append(
@@ -229,7 +333,44 @@ def _wizard_options(curr_node, prev_node, next_node, color="|W", search=False):
                 }
             )
 
-    return options
+    return tuple(options)
+
+
+def _wizard_options(curr_node, prev_node, next_node, color="|W", search=False):
+    """Creates default navigation options available in the wizard."""
+    # the menu may modify the options and their goto-kwargs, so hand out copies
+    return [
+        dict(option, goto=(option["goto"][0], dict(option["goto"][1])))
+        if isinstance(option["goto"], tuple)
+        else dict(option)
+        for option in _wizard_options_cached(curr_node, prev_node, next_node, color, search)
+    ]
+
+
+def _strip(string):
+    "Processor for stripping surrounding whitespace from input"
+    return string.strip()
+
+
+# Input options of the single-value nodes, shared between all renders. This is safe since these
+# nodes are not list_nodes, so EvMenu never modifies their options. Don't modify them in code either.
+_KEY_OPTION = {"key": "_default", "goto": (_set_property, {"prop": "key", "processor": _strip})}
+_LOCATION_OPTION = {
+    "key": "_default",
+    "goto": (_set_property, {"prop": "location", "processor": _strip}),
+}
+_HOME_OPTION = {"key": "_default", "goto": (_set_property, {"prop": "home", "processor": _strip})}
+_DESTINATION_OPTION = {
+    "key": "_default",
+    "goto": (_set_property, {"prop": "destination", "processor": _strip}),
+}
+_PROTOTYPE_DESC_OPTION = {
+    "key": "_default",
+    "goto": (
+        _set_property,
+        {"prop": "prototype_desc", "processor": _strip, "next_node": "node_prototype_desc"},
+    ),
+}
 
 
 def _set_actioninfo(caller, string):
@@ -241,8 +382,40 @@ def _path_cropper(pythonpath):
     return pythonpath.split(".")[-1]
 
 
-def _validate_prototype(prototype):
-    """Run validation on prototype"""
+def _prototype_hash(prototype):
+    """Get a digest identifying the current contents of a prototype"""
+    # repr also tells apart values that hash the same, like 1 and True
+    return hashlib.blake2b(
+        repr(sorted(prototype.items(), key=lambda tup: tup[0])).encode(), digest_size=16
+    ).digest()
+
+
+def _validate_prototype(prototype, caller=None):
+    """
+    Run validation on prototype.
+
+    Args:
+        prototype (dict): The prototype to validate.
+        caller (Object or Account, optional): The user of the menu. If given, the result is
+            cached on the menu, keyed on the prototype's contents, and re-used as long as the
+            prototype looks the same. Since prototype-parents may be changed by others, results
+            older than `_PROTOTYPE_CACHE_TIMEOUT` seconds are re-calculated.
+
+    Returns:
+        err (bool): If validation failed.
+        text (str): The prototype and the result of the validation, for display.
+
+    """
+    if caller:
+        key = _prototype_hash(prototype)
+        cache = getattr(caller.ndb._menutree, "olc_validation_cache", None)
+        if cache is None:
+            cache = caller.ndb._menutree.olc_validation_cache = OrderedDict()
+        now = time.monotonic()
+        cached = cache.get(key)
+        if cached and now - cached[0] < _PROTOTYPE_CACHE_TIMEOUT:
+            cache.move_to_end(key)
+            return cached[1:]
 
     txt = protlib.prototype_to_str(prototype)
     errors = "\n\n|g No validation errors found.|n (but errors could still happen at spawn-time)"
@@ -258,9 +431,15 @@ def _validate_prototype(prototype):
         err = True
 
     text = txt + errors
+    if caller:
+        cache[key] = (now, err, text)
+        cache.move_to_end(key)
+        if len(cache) > _VALIDATION_CACHE_SIZE:
+            cache.popitem(last=False)
     return err, text
 
 
+@lru_cache(maxsize=1)
 def _format_protfuncs():
     out = []
     sorted_funcs = [
@@ -276,6 +455,7 @@ def _format_protfuncs():
     return "\n       ".join(out)
 
 
+@lru_cache(maxsize=1)
 def _format_lockfuncs():
     out = []
     sorted_funcs = [
@@ -407,7 +587,7 @@ def node_validate_prototype(caller, raw_string, **kwargs):
     prototype = _get_flat_menu_prototype(caller, refresh=True, validate=False)
     prev_node = kwargs.get("back", "index")
 
-    _, text = _validate_prototype(prototype)
+    _, text = _validate_prototype(prototype, caller)
 
     helptext = """
     The validator checks if the prototype's various values are on the expected form. It also tests
@@ -590,6 +770,47 @@ def node_search_object(caller, raw_inp, **kwargs):
 # main index (start page) node
 
 
+def _prototype_key_required(prototype):
+    return "prototype_key" not in prototype
+
+
+def _typeclass_required(prototype):
+    "A typeclass must be given either directly or through a parent"
+    return "prototype_parent" not in prototype and "typeclass" not in prototype
+
+
+# (label, prototype key, callable(prototype) -> required, cropper, node)
+_INDEX_FIELDS = (
+    (
+        "|WPrototype-Key",
+        "prototype_key",
+        _prototype_key_required,
+        _menu_cropper,
+        "node_prototype_key",
+    ),
+    (
+        "|WPrototype-Parent",
+        "prototype_parent",
+        _typeclass_required,
+        _menu_cropper,
+        "node_prototype_parent",
+    ),
+    ("|wTypeclass", "typeclass", _typeclass_required, _path_cropper, "node_typeclass"),
+    ("|wKey", "key", None, _menu_cropper, "node_key"),
+    ("|wAliases", "aliases", None, _menu_cropper, "node_aliases"),
+    ("|wAttrs", "attrs", None, _menu_cropper, "node_attrs"),
+    ("|wTags", "tags", None, _menu_cropper, "node_tags"),
+    ("|wLocks", "locks", None, _menu_cropper, "node_locks"),
+    ("|wPermissions", "permissions", None, _menu_cropper, "node_permissions"),
+    ("|wLocation", "location", None, _menu_cropper, "node_location"),
+    ("|wHome", "home", None, _menu_cropper, "node_home"),
+    ("|wDestination", "destination", None, _menu_cropper, "node_destination"),
+    ("|WPrototype-Desc", "prototype_desc", None, _menu_cropper, "node_prototype_desc"),
+    ("|WPrototype-Tags", "prototype_tags", None, _menu_cropper, "node_prototype_tags"),
+    ("|WPrototype-Locks", "prototype_locks", None, _menu_cropper, "node_prototype_locks"),
+)
+
+
 def node_index(caller):
     prototype = _get_menu_prototype(caller)
 
@@ -646,54 +867,18 @@ def node_index(caller):
 
     text = (text, helptxt)
 
-    options = []
-    options.append(
+    options = [
         {
-            "desc": "|WPrototype-Key|n|n{}".format(
-                _format_option_value("Key", "prototype_key" not in prototype, prototype, None)
+            "desc": "{}|n{}".format(
+                label,
+                _format_option_value(
+                    key, required(prototype) if required else False, prototype, cropper
+                ),
             ),
-            "goto": "node_prototype_key",
+            "goto": node,
         }
-    )
-    for key in (
-        "Prototype_Parent",
-        "Typeclass",
-        "Key",
-        "Aliases",
-        "Attrs",
-        "Tags",
-        "Locks",
-        "Permissions",
-        "Location",
-        "Home",
-        "Destination",
-    ):
-        required = False
-        cropper = None
-        if key in ("Prototype_Parent", "Typeclass"):
-            required = ("prototype_parent" not in prototype) and ("typeclass" not in prototype)
-        if key == "Typeclass":
-            cropper = _path_cropper
-        options.append(
-            {
-                "desc": "{}{}|n{}".format(
-                    "|W" if key == "Prototype_Parent" else "|w",
-                    key.replace("_", "-"),
-                    _format_option_value(key, required, prototype, cropper=cropper),
-                ),
-                "goto": "node_{}".format(key.lower()),
-            }
-        )
-    required = False
-    for key in ("Desc", "Tags", "Locks"):
-        options.append(
-            {
-                "desc": "|WPrototype-{}|n|n{}".format(
-                    key, _format_option_value(key, required, prototype, None)
-                ),
-                "goto": "node_prototype_{}".format(key.lower()),
-            }
-        )
+        for label, key, required, cropper, node in _INDEX_FIELDS
+    ]
 
     options.extend(
         (
@@ -712,7 +897,7 @@ def node_index(caller):
 
 
 def _check_prototype_key(caller, key):
-    old_prototype = protlib.search_prototype(key)
+    old_prototype = _cached_search_prototype(caller, key)
     olc_new = _is_new_prototype(caller)
     key = key.strip().lower()
     if old_prototype:
@@ -730,7 +915,7 @@ def _check_prototype_key(caller, key):
         elif olc_new:
             # we are selecting an existing prototype to edit. Reset to index.
             del caller.ndb._menutree.olc_new
-            caller.ndb._menutree.olc_prototype = old_prototype
+            caller.ndb._menutree.olc_prototype = deepcopy(old_prototype)
             caller.msg("Prototype already exists. Reloading.")
             return "node_index"
 
@@ -770,7 +955,7 @@ def _all_prototype_parents(caller):
     """Return prototype_key of all available prototypes for listing in menu"""
     return [
         prototype["prototype_key"]
-        for prototype in protlib.search_prototype()
+        for prototype in _cached_search_prototype(caller)
         if "prototype_key" in prototype
     ]
 
@@ -784,7 +969,7 @@ def _prototype_parent_actions(caller, raw_inp, **kwargs):
 
     if prototype_parent:
         # a selection of parent was made
-        prototype_parent = protlib.search_prototype(key=prototype_parent)[0]
+        prototype_parent = _cached_search_prototype(caller, prototype_parent)[0]
         prototype_parent_key = prototype_parent["prototype_key"]
 
         # which action to apply on the selection
@@ -842,7 +1027,7 @@ def _prototype_parent_actions(caller, raw_inp, **kwargs):
 def _prototype_parent_select(caller, new_parent):
 
     ret = None
-    prototype_parent = protlib.search_prototype(new_parent)
+    prototype_parent = _cached_search_prototype(caller, new_parent)
     try:
         if prototype_parent:
             spawner.flatten_prototype(prototype_parent[0], validate=True)
@@ -892,7 +1077,7 @@ def node_prototype_parent(caller):
     ptexts = []
     if prot_parent_keys:
         for pkey in utils.make_iter(prot_parent_keys):
-            prot_parent = protlib.search_prototype(pkey)
+            prot_parent = _cached_search_prototype(caller, pkey)
             if prot_parent:
                 prot_parent = prot_parent[0]
                 ptexts.append(
@@ -919,13 +1104,40 @@ def node_prototype_parent(caller):
 # typeclasses node
 
 
+def _cached_typeclasses(caller, parent=None):
+    """
+    Get available typeclasses, re-using earlier results from this menu session.
+
+    Args:
+        caller (Object or Account): The user of the menu.
+        parent (str, optional): Only return typeclasses inheriting from this parent. The parent
+            itself is not included.
+
+    Returns:
+        paths (tuple): The python-paths of all typeclasses, sorted.
+        mapping (dict): The typeclasses on the form `{path: typeclass, ...}`.
+
+    Notes:
+        Typeclasses only become available once their modules are imported, which may happen at
+        any time, so this is cached on the menu rather than for the whole server.
+
+    """
+    cache = getattr(caller.ndb._menutree, "olc_typeclass_cache", None)
+    if cache is None:
+        cache = caller.ndb._menutree.olc_typeclass_cache = {}
+    if parent not in cache:
+        mapping = {
+            name: typeclass
+            for name, typeclass in utils.get_all_typeclasses(parent).items()
+            if name != parent
+        }
+        cache[parent] = (tuple(sorted(mapping)), mapping)
+    return cache[parent]
+
+
 def _all_typeclasses(caller):
     """Get name of available typeclasses."""
-    return list(
-        name
-        for name in sorted(utils.get_all_typeclasses("evennia.objects.models.ObjectDB").keys())
-        if name != "evennia.objects.models.ObjectDB"
-    )
+    return list(_cached_typeclasses(caller, "evennia.objects.models.ObjectDB")[0])
 
 
 def _typeclass_actions(caller, raw_inp, **kwargs):
@@ -938,7 +1150,7 @@ def _typeclass_actions(caller, raw_inp, **kwargs):
 
     if typeclass_path:
         if action == "examine":
-            typeclass = utils.get_all_typeclasses().get(typeclass_path)
+            typeclass = _cached_typeclasses(caller)[1].get(typeclass_path)
             if typeclass:
                 docstr = []
                 for line in typeclass.__doc__.split("\n"):
@@ -1008,34 +1220,25 @@ def node_typeclass(caller):
 
 
 def node_key(caller):
-    text = """
+    text = f"""
         The |cKey|n is the given name of the object to spawn. This will retain the given case.
 
-        {current}
-    """.format(
-        current=_get_current_value(caller, "key")
-    )
+        {_get_current_value(caller, "key")}
+    """
 
-    helptext = """
+    helptext = f"""
         The key should often not be identical for every spawned object. Using a randomising
         $protfunc can be used, for example |c$choice(Alan, Tom, John)|n will give one of the three
         names every time an object of this prototype is spawned.
 
         |c$protfuncs|n
-        {pfuncs}
-    """.format(
-        pfuncs=_format_protfuncs()
-    )
+        {_format_protfuncs()}
+    """
 
     text = (text, helptext)
 
     options = _wizard_options("key", "typeclass", "aliases")
-    options.append(
-        {
-            "key": "_default",
-            "goto": (_set_property, dict(prop="key", processor=lambda s: s.strip())),
-        }
-    )
+    options.append(_KEY_OPTION)
     return text, options
 
 
@@ -1091,33 +1294,30 @@ def _aliases_actions(caller, raw_inp, **kwargs):
 @list_node(_all_aliases, _aliases_select)
 def node_aliases(caller):
 
-    text = """
+    current = _get_current_value(
+        caller,
+        "aliases",
+        comparer=lambda propval, flatval: [al for al in flatval if al not in propval],
+        formatter=lambda lst: "\n" + ", ".join(lst),
+        only_inherit=True,
+    )
+    text = f"""
         |cAliases|n are alternative ways to address an object, next to its |cKey|n.  Aliases are not
         case sensitive.
 
         {current}
-    """.format(
-        current=_get_current_value(
-            caller,
-            "aliases",
-            comparer=lambda propval, flatval: [al for al in flatval if al not in propval],
-            formatter=lambda lst: "\n" + ", ".join(lst),
-            only_inherit=True,
-        )
-    )
+    """
     _set_actioninfo(
         caller, _format_list_actions("remove", prefix="|w<text>|W to add new alias. Other action: ")
     )
 
-    helptext = """
+    helptext = f"""
         Aliases are fixed alternative identifiers and are stored with the new object.
 
         |c$protfuncs|n
 
-        {pfuncs}
-    """.format(
-        pfuncs=_format_protfuncs()
-    )
+        {_format_protfuncs()}
+    """
 
     text = (text, helptext)
 
@@ -1139,13 +1339,9 @@ def _caller_attrs(caller):
 
 
 def _get_tup_by_attrname(caller, attrname):
-    prototype = _get_menu_prototype(caller)
-    attrs = prototype.get("attrs", [])
-    try:
-        inp = [tup[0] for tup in attrs].index(attrname)
-        return attrs[inp]
-    except ValueError:
-        return None
+    attrs, index = _get_entry_index(caller, "attrs")
+    ind = index.get(attrname)
+    return None if ind is None else attrs[ind]
 
 
 def _display_attribute(attr_tuple):
@@ -1191,38 +1387,33 @@ def _add_attr(caller, attr_string, **kwargs):
         attrname = attr_string.lower().strip()
     elif "=" in attr_string:
         attrname, value = (part.strip() for part in attr_string.split("=", 1))
-        attrname = attrname.lower()
-        nameparts = attrname.split(";", 2)
-        nparts = len(nameparts)
-        if nparts == 2:
-            attrname, category = nameparts
-        elif nparts > 2:
-            attrname, category, locks = nameparts
+        # a missing category is None, an empty one (attrname;;locks) is ''
+        attrname, category, locks = (attrname.lower().split(";", 2) + [None, None])[:3]
+        locks = locks or ""
     attr_tuple = (attrname, value, category, str(locks))
 
     if attrname:
-        prot = _get_menu_prototype(caller)
-        attrs = prot.get("attrs", [])
+        attrs, index = _get_entry_index(caller, "attrs")
+        ind = index.get(attrname)
 
         if "delete" in kwargs:
-            try:
-                ind = [tup[0] for tup in attrs].index(attrname)
-                del attrs[ind]
-                _set_prototype_value(caller, "attrs", attrs)
-                return "Removed Attribute '{}'".format(attrname)
-            except IndexError:
+            if ind is None:
                 return "Attribute to delete not found."
+            del attrs[ind]
+            _clear_entry_index(caller, "attrs")
+            _store_entries(caller, "attrs", attrs)
+            return "Removed Attribute '{}'".format(attrname)
 
-        try:
+        if ind is None:
+            attrs.append(attr_tuple)
+            index[attrname] = len(attrs) - 1
+            text = "Added Attribute " + _display_attribute(attr_tuple)
+        else:
             # replace existing attribute with the same name in the prototype
-            ind = [tup[0] for tup in attrs].index(attrname)
             attrs[ind] = attr_tuple
             text = "Edited Attribute '{}'.".format(attrname)
-        except ValueError:
-            attrs.append(attr_tuple)
-            text = "Added Attribute " + _display_attribute(attr_tuple)
 
-        _set_prototype_value(caller, "attrs", attrs)
+        _store_entries(caller, "attrs", attrs)
     else:
         text = "Attribute must be given as 'attrname[;category;locks] = <value>'."
 
@@ -1333,13 +1524,9 @@ def _caller_tags(caller):
 
 
 def _get_tup_by_tagname(caller, tagname):
-    prototype = _get_menu_prototype(caller)
-    tags = prototype.get("tags", [])
-    try:
-        inp = [tup[0] for tup in tags].index(tagname)
-        return tags[inp]
-    except ValueError:
-        return None
+    tags, index = _get_entry_index(caller, "tags")
+    ind = index.get(tagname)
+    return None if ind is None else tags[ind]
 
 
 def _display_tag(tag_tuple):
@@ -1377,39 +1564,34 @@ def _add_tag(caller, tag_string, **kwargs):
     if "delete" in kwargs:
         tag = tag_string.lower().strip()
     else:
-        nameparts = tag.split(";", 2)
-        ntuple = len(nameparts)
-        if ntuple == 2:
-            tag, category = nameparts
-        elif ntuple > 2:
-            tag, category, data = nameparts[:3]
+        tag, category, data = (tag.split(";", 2) + [None, None])[:3]
+        data = data or ""
 
     tag_tuple = (tag.lower(), category.lower() if category else None, data)
 
     if tag:
-        prot = _get_menu_prototype(caller)
-        tags = prot.get("tags", [])
-
-        old_tag = _get_tup_by_tagname(caller, tag)
+        tags, index = _get_entry_index(caller, "tags")
+        ind = index.get(tag)
 
         if "delete" in kwargs:
 
-            if old_tag:
-                tags.pop(tags.index(old_tag))
+            if ind is not None:
+                del tags[ind]
+                _clear_entry_index(caller, "tags")
                 text = "Removed Tag '{}'.".format(tag)
             else:
                 text = "Found no Tag to remove."
-        elif not old_tag:
+        elif ind is None:
             # a fresh, new tag
             tags.append(tag_tuple)
+            index[tag] = len(tags) - 1
             text = "Added Tag '{}'".format(tag)
         else:
             # old tag exists; editing a tag means replacing old with new
-            ind = tags.index(old_tag)
             tags[ind] = tag_tuple
             text = "Edited Tag '{}'".format(tag)
 
-        _set_prototype_value(caller, "tags", tags)
+        _store_entries(caller, "tags", tags)
     else:
         text = "Tag must be given as 'tag[;category;data]'."
 
@@ -1570,7 +1752,17 @@ def node_locks(caller):
         cmp1 = [lck.split(":", 1)[0] for lck in propval.split(";")]
         return ";".join(lstr for lstr in flatval.split(";") if lstr.split(":", 1)[0] not in cmp1)
 
-    text = """
+    current = _get_current_value(
+        caller,
+        "locks",
+        comparer=_currentcmp,
+        formatter=lambda lockstr: "\n".join(
+            _locks_display(caller, lstr) for lstr in lockstr.split(";")
+        ),
+        only_inherit=True,
+    )
+    action = _format_list_actions("examine", "remove", prefix="Actions: ")
+    text = f"""
         The |cLock string|n defines limitations for accessing various properties of the object once
         it's spawned. The string should be on one of the following forms:
 
@@ -1578,20 +1770,9 @@ def node_locks(caller):
             locktype: [NOT] lockfunc(args) [AND|OR|NOT] lockfunc(args) [AND|OR|NOT] ...
 
         {current}{action}
-        """.format(
-        current=_get_current_value(
-            caller,
-            "locks",
-            comparer=_currentcmp,
-            formatter=lambda lockstr: "\n".join(
-                _locks_display(caller, lstr) for lstr in lockstr.split(";")
-            ),
-            only_inherit=True,
-        ),
-        action=_format_list_actions("examine", "remove", prefix="Actions: "),
-    )
+        """
 
-    helptext = """
+    helptext = f"""
         Here is an example of two lock strings:
 
             edit:false()
@@ -1604,10 +1785,8 @@ def node_locks(caller):
 
         |cAvailable lockfuncs:|n
 
-        {lfuncs}
-    """.format(
-        lfuncs=_format_lockfuncs()
-    )
+        {_format_lockfuncs()}
+    """
 
     text = (text, helptext)
 
@@ -1701,37 +1880,34 @@ def node_permissions(caller):
         cmp1 = [perm.lower() for perm in pval]
         return [perm for perm in fval if perm.lower() not in cmp1]
 
-    text = """
+    current = _get_current_value(
+        caller,
+        "permissions",
+        comparer=_currentcmp,
+        formatter=lambda lst: "\n" + "\n".join(prm for prm in lst),
+        only_inherit=True,
+    )
+    text = f"""
         |cPermissions|n are simple strings used to grant access to this object. A permission is used
         when a |clock|n is checked that contains the |wperm|n or |wpperm|n lock functions. Certain
         permissions belong in the |cpermission hierarchy|n together with the |Wperm()|n lock
         function.
 
         {current}
-    """.format(
-        current=_get_current_value(
-            caller,
-            "permissions",
-            comparer=_currentcmp,
-            formatter=lambda lst: "\n" + "\n".join(prm for prm in lst),
-            only_inherit=True,
-        )
-    )
+    """
     _set_actioninfo(caller, _format_list_actions("examine", "remove", prefix="Actions: "))
 
-    helptext = """
+    helptext = f"""
         Any string can act as a permission as long as a lock is set to look for it. Depending on the
         lock, having a permission could even be negative (i.e. the lock is only passed if you
         |wdon't|n have the 'permission'). The most common permissions are the hierarchical
         permissions:
 
-            {permissions}.
+            {", ".join(settings.PERMISSION_HIERARCHY)}.
 
         For example, a |clock|n string like "edit:perm(Builder)" will grant access to accessors
         having the |cpermission|n "Builder" or higher.
-    """.format(
-        permissions=", ".join(settings.PERMISSION_HIERARCHY)
-    )
+    """
 
     text = (text, helptext)
 
@@ -1746,35 +1922,26 @@ def node_permissions(caller):
 
 def node_location(caller):
 
-    text = """
+    text = f"""
         The |cLocation|n of this object in the world. If not given, the object will spawn in the
-        inventory of |c{caller}|n by default.
+        inventory of |c{caller.key}|n by default.
 
-        {current}
-    """.format(
-        caller=caller.key, current=_get_current_value(caller, "location")
-    )
+        {_get_current_value(caller, "location")}
+    """
 
-    helptext = """
+    helptext = f"""
         You get the most control by not specifying the location - you can then teleport the spawned
         objects as needed later. Setting the location may be useful for quickly populating a given
         location. One could also consider randomizing the location using a $protfunc.
 
         |c$protfuncs|n
-        {pfuncs}
-    """.format(
-        pfuncs=_format_protfuncs()
-    )
+        {_format_protfuncs()}
+    """
 
     text = (text, helptext)
 
     options = _wizard_options("location", "permissions", "home", search=True)
-    options.append(
-        {
-            "key": "_default",
-            "goto": (_set_property, dict(prop="location", processor=lambda s: s.strip())),
-        }
-    )
+    options.append(_LOCATION_OPTION)
     return text, options
 
 
@@ -1783,18 +1950,16 @@ def node_location(caller):
 
 def node_home(caller):
 
-    text = """
+    text = f"""
         The |cHome|n location of an object is often only used as a backup - this is where the object
         will be moved to if its location is deleted. The home location can also be used as an actual
         home for characters to quickly move back to.
 
-        If unset, the global home default (|w{default}|n) will be used.
+        If unset, the global home default (|w{settings.DEFAULT_HOME}|n) will be used.
 
-        {current}
-        """.format(
-        default=settings.DEFAULT_HOME, current=_get_current_value(caller, "home")
-    )
-    helptext = """
+        {_get_current_value(caller, "home")}
+        """
+    helptext = f"""
         The home can be given as a #dbref but can also be specified using the protfunc
         '$obj(name)'. Use |wSE|nearch to find objects in the database.
 
@@ -1802,20 +1967,13 @@ def node_home(caller):
         enough.
 
         |c$protfuncs|n
-        {pfuncs}
-    """.format(
-        pfuncs=_format_protfuncs()
-    )
+        {_format_protfuncs()}
+    """
 
     text = (text, helptext)
 
     options = _wizard_options("home", "location", "destination", search=True)
-    options.append(
-        {
-            "key": "_default",
-            "goto": (_set_property, dict(prop="home", processor=lambda s: s.strip())),
-        }
-    )
+    options.append(_HOME_OPTION)
     return text, options
 
 
@@ -1824,34 +1982,25 @@ def node_home(caller):
 
 def node_destination(caller):
 
-    text = """
+    text = f"""
         The object's |cDestination|n is generally only used by Exit-like objects to designate where
         the exit 'leads to'. It's usually unset for all other types of objects.
 
-        {current}
-    """.format(
-        current=_get_current_value(caller, "destination")
-    )
+        {_get_current_value(caller, "destination")}
+    """
 
-    helptext = """
+    helptext = f"""
         The destination can be given as a #dbref but can also be specified using the protfunc
         '$obj(name)'. Use |wSEearch to find objects in the database.
 
         |c$protfuncs|n
-        {pfuncs}
-    """.format(
-        pfuncs=_format_protfuncs()
-    )
+        {_format_protfuncs()}
+    """
 
     text = (text, helptext)
 
     options = _wizard_options("destination", "home", "prototype_desc", search=True)
-    options.append(
-        {
-            "key": "_default",
-            "goto": (_set_property, dict(prop="destination", processor=lambda s: s.strip())),
-        }
-    )
+    options.append(_DESTINATION_OPTION)
     return text, options
 
 
@@ -1860,13 +2009,11 @@ def node_destination(caller):
 
 def node_prototype_desc(caller):
 
-    text = """
+    text = f"""
         The |cPrototype-Description|n briefly describes the prototype when it's viewed in listings.
 
-        {current}
-        """.format(
-        current=_get_current_value(caller, "prototype_desc")
-    )
+        {_get_current_value(caller, "prototype_desc")}
+        """
 
     helptext = """
         Giving a brief description helps you and others to locate the prototype for use later.
@@ -1875,19 +2022,7 @@ def node_prototype_desc(caller):
     text = (text, helptext)
 
     options = _wizard_options("prototype_desc", "prototype_key", "prototype_tags")
-    options.append(
-        {
-            "key": "_default",
-            "goto": (
-                _set_property,
-                dict(
-                    prop="prototype_desc",
-                    processor=lambda s: s.strip(),
-                    next_node="node_prototype_desc",
-                ),
-            ),
-        }
-    )
+    options.append(_PROTOTYPE_DESC_OPTION)
 
     return text, options
 
@@ -1968,29 +2103,26 @@ def _prototype_tags_actions(caller, raw_inp, **kwargs):
 @list_node(_caller_prototype_tags, _prototype_tag_select)
 def node_prototype_tags(caller):
 
-    text = """
+    current = _get_current_value(
+        caller,
+        "prototype_tags",
+        formatter=lambda lst: ", ".join(tg for tg in lst),
+        only_inherit=True,
+    )
+    text = f"""
         |cPrototype-Tags|n can be used to classify and find prototypes in listings Tag names are not
         case-sensitive and can have not have a custom category.
 
         {current}
-        """.format(
-        current=_get_current_value(
-            caller,
-            "prototype_tags",
-            formatter=lambda lst: ", ".join(tg for tg in lst),
-            only_inherit=True,
-        )
-    )
+        """
     _set_actioninfo(
         caller, _format_list_actions("remove", prefix="|w<text>|n|W to add Tag. Other Action:|n ")
     )
-    helptext = """
+    helptext = f"""
         Using prototype-tags is a good way to organize and group large numbers of prototypes by
         genre, type etc. Under the hood, prototypes' tags will all be stored with the category
-        '{tagmetacategory}'.
-    """.format(
-        tagmetacategory=protlib._PROTOTYPE_TAG_META_CATEGORY
-    )
+        '{protlib._PROTOTYPE_TAG_META_CATEGORY}'.
+    """
 
     text = (text, helptext)
 
@@ -2068,7 +2200,15 @@ def _prototype_locks_actions(caller, raw_inp, **kwargs):
 @list_node(_caller_prototype_locks, _prototype_lock_select)
 def node_prototype_locks(caller):
 
-    text = """
+    current = _get_current_value(
+        caller,
+        "prototype_locks",
+        formatter=lambda lstring: "\n".join(
+            _locks_display(caller, lstr) for lstr in lstring.split(";")
+        ),
+        only_inherit=True,
+    )
+    text = f"""
         |cPrototype-Locks|n are used to limit access to this prototype when someone else is trying
         to access it. By default any prototype can be edited only by the creator and by Admins while
         they can be used by anyone with access to the spawn command. There are two valid lock types
@@ -2080,16 +2220,7 @@ def node_prototype_locks(caller):
         If unsure, keep the open defaults.
 
         {current}
-    """.format(
-        current=_get_current_value(
-            caller,
-            "prototype_locks",
-            formatter=lambda lstring: "\n".join(
-                _locks_display(caller, lstr) for lstr in lstring.split(";")
-            ),
-            only_inherit=True,
-        )
-    )
+    """
     _set_actioninfo(caller, _format_list_actions("examine", "remove", prefix="Actions: "))
 
     helptext = """
@@ -2109,14 +2240,46 @@ def node_prototype_locks(caller):
 # update existing objects node
 
 
+def _get_spawned_ids(prototype_key):
+    """
+    Get the database ids of all objects spawned from a prototype. The menu passes these ids
+    between nodes instead of the objects themselves, which are only fetched when needed.
+
+    """
+    return list(protlib.search_objects_with_prototype(prototype_key).values_list("id", flat=True))
+
+
+def _get_objects(objects):
+    """Get objects from a list of objects or their database ids"""
+    if objects and isinstance(objects[0], int):
+        return list(ObjectDB.objects.filter(id__in=objects))
+    return objects
+
+
 def _apply_diff(caller, **kwargs):
     """update existing objects"""
     prototype = kwargs["prototype"]
     objects = kwargs["objects"]
     back_node = kwargs["back_node"]
     diff = kwargs.get("diff", None)
-    num_changed = spawner.batch_update_objects_with_prototype(prototype, diff=diff, objects=objects)
-    caller.msg("|g{num} objects were updated successfully.|n".format(num=num_changed))
+    if diff and objects and isinstance(objects[0], int):
+        # update objects given by id in batches, so we don't need to load them all at once. We
+        # can only do this with a diff, or each batch would calculate its own from its first object
+        batches = (
+            objects[ind : ind + _UPDATE_BATCH_SIZE]
+            for ind in range(0, len(objects), _UPDATE_BATCH_SIZE)
+        )
+    else:
+        batches = (objects,)
+    num_changed = 0
+    for batch in batches:
+        batch = _get_objects(batch)
+        if batch:
+            # an empty list would make the spawner search for all objects using the prototype
+            num_changed += spawner.batch_update_objects_with_prototype(
+                prototype, diff=diff, objects=batch
+            )
+    caller.msg(f"|g{num_changed} objects were updated successfully.|n")
     return back_node
 
 
@@ -2271,6 +2434,12 @@ def node_apply_diff(caller, **kwargs):
     diff = kwargs.get("diff", None)
     custom_location = kwargs.get("custom_location", None)
 
+    if update_objects and isinstance(update_objects[0], int):
+        # drop objects deleted since they were listed
+        update_objects = list(
+            ObjectDB.objects.filter(id__in=update_objects).values_list("id", flat=True)
+        )
+
     if not update_objects:
         text = "There are no existing objects to update."
         options = {"key": "_default", "goto": back_node}
@@ -2278,7 +2447,7 @@ def node_apply_diff(caller, **kwargs):
 
     if not diff:
         # use one random object as a reference to calculate a diff
-        base_obj = choice(update_objects)
+        base_obj = _get_objects([choice(update_objects)])[0]
 
         diff, obj_prototype = spawner.prototype_diff_from_object(prototype, base_obj)
 
@@ -2353,9 +2522,16 @@ def node_apply_diff(caller, **kwargs):
 
 # prototype save node
 
+_SAVE_YES_OPTION = {"key": ("[|wY|Wes|n]", "yes", "y"), "desc": "Save prototype"}
+_SAVE_NO_OPTION = {
+    "key": ("|wN|Wo|n", "n"),
+    "desc": "Abort and return to Index",
+    "goto": "node_index",
+}
+
 
 def node_prototype_save(caller, **kwargs):
-    """Save prototype to disk """
+    """Save prototype to disk"""
     # these are only set if we selected 'yes' to save on a previous pass
     prototype = kwargs.get("prototype", None)
     # set to True/False if answered, None if first pass
@@ -2368,19 +2544,19 @@ def node_prototype_save(caller, **kwargs):
         try:
             protlib.save_prototype(prototype)
         except Exception as exc:
-            text = "|rCould not save:|n {}\n(press Return to continue)".format(exc)
+            text = f"|rCould not save:|n {exc}\n(press Return to continue)"
             options = {"key": "_default", "goto": "node_index"}
             return text, options
+        _clear_prototype_cache(caller)
 
-        spawned_objects = protlib.search_objects_with_prototype(prototype_key)
-        nspawned = spawned_objects.count()
+        spawned_objects = _get_spawned_ids(prototype_key)
+        nspawned = len(spawned_objects)
 
         text = ["|gPrototype saved.|n"]
 
         if nspawned:
             text.append(
-                "\nDo you want to update {} object(s) "
-                "already using this prototype?".format(nspawned)
+                f"\nDo you want to update {nspawned} object(s) already using this prototype?"
             )
             options = (
                 {
@@ -2419,31 +2595,23 @@ def node_prototype_save(caller, **kwargs):
 
     # not validated yet
     prototype = _get_menu_prototype(caller)
-    error, text = _validate_prototype(prototype)
-
-    text = [text]
+    error, text = _validate_prototype(prototype, caller)
 
     if error:
         # abort save
-        text.append(
-            "\n|yValidation errors were found. They need to be corrected before this prototype "
+        text += (
+            "\n\n|yValidation errors were found. They need to be corrected before this prototype "
             "can be saved (or used to spawn).|n"
         )
         options = _wizard_options("prototype_save", "index", None)
         options.append({"key": "_default", "goto": "node_index"})
-        return "\n".join(text), options
+        return text, options
 
     prototype_key = prototype["prototype_key"]
-    if protlib.search_prototype(prototype_key):
-        text.append(
-            "\nDo you want to save/overwrite the existing prototype '{name}'?".format(
-                name=prototype_key
-            )
-        )
+    if _cached_search_prototype(caller, prototype_key):
+        text += f"\n\nDo you want to save/overwrite the existing prototype '{prototype_key}'?"
     else:
-        text.append("\nDo you want to save the prototype as '{name}'?".format(name=prototype_key))
-
-    text = "\n".join(text)
+        text += f"\n\nDo you want to save the prototype as '{prototype_key}'?"
 
     helptext = """
         Saving the prototype makes it available for use later. It can also be used to inherit from,
@@ -2455,17 +2623,11 @@ def node_prototype_save(caller, **kwargs):
 
     text = (text, helptext)
 
+    save_goto = ("node_prototype_save", {"accept_save": True, "prototype": prototype})
     options = (
-        {
-            "key": ("[|wY|Wes|n]", "yes", "y"),
-            "desc": "Save prototype",
-            "goto": ("node_prototype_save", {"accept_save": True, "prototype": prototype}),
-        },
-        {"key": ("|wN|Wo|n", "n"), "desc": "Abort and return to Index", "goto": "node_index"},
-        {
-            "key": "_default",
-            "goto": ("node_prototype_save", {"accept_save": True, "prototype": prototype}),
-        },
+        {**_SAVE_YES_OPTION, "goto": save_goto},
+        _SAVE_NO_OPTION,
+        {"key": "_default", "goto": save_goto},
     )
 
     return text, options
@@ -2475,25 +2637,42 @@ def node_prototype_save(caller, **kwargs):
 
 
 def _spawn(caller, **kwargs):
-    """Spawn prototype"""
-    prototype = kwargs["prototype"].copy()
-    new_location = kwargs.get("location", None)
-    if new_location:
-        prototype["location"] = new_location
-    if not prototype.get("location"):
-        prototype["location"] = caller
-
-    obj = spawner.spawn(prototype)
+    """
+    Spawn prototype.
+
+    Kwargs:
+        prototype (dict): The prototype to spawn.
+        location (Object, optional): Override the prototype's location.
+        spawn_at (str, optional): If given, `prototype` and `location` are instead taken from
+            the context stored on the menu by the spawn node, where this is the name of the
+            location to use.
+
+    """
+    spawn_at = kwargs.get("spawn_at")
+    if spawn_at:
+        context = caller.ndb._menutree.olc_spawn_context
+        prototype, new_location = context["prototype"], context["locations"][spawn_at]
+    else:
+        prototype, new_location = kwargs["prototype"], kwargs.get("location", None)
+    location = new_location or prototype.get("location") or caller
+    # the spawner needs a real dict and may modify it, so we can't hand it the menu's prototype
+    obj = spawner.spawn({**prototype, "location": location})
     if obj:
         obj = obj[0]
-        text = "|gNew instance|n {key} ({dbref}) |gspawned at location |n{loc}|n|g.|n".format(
-            key=obj.key, dbref=obj.dbref, loc=prototype["location"]
+        text = (
+            f"|gNew instance|n {obj.key} ({obj.dbref}) "
+            f"|gspawned at location |n{location}|n|g.|n"
         )
     else:
         text = "|rError: Spawner did not return a new instance.|n"
     return "node_examine_entity", {"text": text, "back": "prototype_spawn"}
 
 
+_SPAWN_AT_LOCATION = (_spawn, {"spawn_at": "location"})
+_SPAWN_AT_CALLER_LOCATION = (_spawn, {"spawn_at": "caller_location"})
+_SPAWN_AT_CALLER = (_spawn, {"spawn_at": "caller"})
+
+
 def node_prototype_spawn(caller, **kwargs):
     """Submenu for spawning the prototype"""
 
@@ -2502,17 +2681,14 @@ def node_prototype_spawn(caller, **kwargs):
     already_validated = kwargs.get("already_validated", False)
 
     if already_validated:
-        error, text = None, []
+        error, text = None, ""
     else:
-        error, text = _validate_prototype(prototype)
-        text = [text]
+        error, text = _validate_prototype(prototype, caller)
 
     if error:
-        text.append("\n|rPrototype validation failed. Correct the errors before spawning.|n")
+        text += "\n\n|rPrototype validation failed. Correct the errors before spawning.|n"
         options = _wizard_options("prototype_spawn", "index", None)
-        return "\n".join(text), options
-
-    text = "\n".join(text)
+        return text, options
 
     helptext = """
         Spawning is the act of instantiating a prototype into an actual object. As a new object is
@@ -2527,45 +2703,44 @@ def node_prototype_spawn(caller, **kwargs):
     options = []
     prototype_key = prototype["prototype_key"]
     location = prototype.get("location", None)
+    caller_loc = caller.location
+    # the spawn options pick what to spawn from here
+    caller.ndb._menutree.olc_spawn_context = {
+        "prototype": prototype,
+        "locations": {"location": location, "caller_location": caller_loc, "caller": caller},
+    }
 
     if location:
         options.append(
             {
-                "desc": "Spawn in prototype's defined location ({loc})".format(loc=location),
-                "goto": (
-                    _spawn,
-                    dict(prototype=prototype, location=location, custom_location=True),
-                ),
-            }
-        )
-    caller_loc = caller.location
-    if location != caller_loc:
-        options.append(
-            {
-                "desc": "Spawn in {caller}'s location ({loc})".format(
-                    caller=caller, loc=caller_loc
-                ),
-                "goto": (_spawn, dict(prototype=prototype, location=caller_loc)),
+                "desc": f"Spawn in prototype's defined location ({location})",
+                "goto": _SPAWN_AT_LOCATION,
             }
         )
-    if location != caller_loc != caller:
+    # the prototype's location may be given as a #dbref
+    location_ref = location.dbref if hasattr(location, "dbref") else location
+    caller_loc_ref = caller_loc.dbref if caller_loc else None
+    caller_name = str(caller)
+    if location_ref != caller_loc_ref:
         options.append(
             {
-                "desc": "Spawn in {caller}'s inventory".format(caller=caller),
-                "goto": (_spawn, dict(prototype=prototype, location=caller)),
+                "desc": f"Spawn in {caller_name}'s location ({caller_loc})",
+                "goto": _SPAWN_AT_CALLER_LOCATION,
             }
         )
+    if location_ref != caller_loc_ref and caller_loc_ref != caller.dbref:
+        options.append({"desc": f"Spawn in {caller_name}'s inventory", "goto": _SPAWN_AT_CALLER})
 
-    spawned_objects = protlib.search_objects_with_prototype(prototype_key)
-    nspawned = spawned_objects.count()
-    if spawned_objects:
+    spawned_objects = _get_spawned_ids(prototype_key)
+    nspawned = len(spawned_objects)
+    if nspawned:
         options.append(
             {
-                "desc": "Update {num} existing objects with this prototype".format(num=nspawned),
+                "desc": f"Update {nspawned} existing objects with this prototype",
                 "goto": (
                     "node_apply_diff",
                     {
-                        "objects": list(spawned_objects),
+                        "objects": spawned_objects,
                         "prototype": prototype,
                         "back_node": "node_prototype_spawn",
                     },
@@ -2582,19 +2757,16 @@ def node_prototype_spawn(caller, **kwargs):
 
 
 def _prototype_load_select(caller, prototype_key):
-    matches = protlib.search_prototype(key=prototype_key)
+    matches = _cached_search_prototype(caller, prototype_key)
     if matches:
-        prototype = matches[0]
+        prototype = deepcopy(matches[0])
         _set_menu_prototype(caller, prototype)
         return (
             "node_examine_entity",
-            {
-                "text": "|gLoaded prototype {}.|n".format(prototype["prototype_key"]),
-                "back": "index",
-            },
+            {"text": f"|gLoaded prototype {prototype['prototype_key']}.|n", "back": "index"},
         )
     else:
-        caller.msg("|rFailed to load prototype '{}'.".format(prototype_key))
+        caller.msg(f"|rFailed to load prototype '{prototype_key}'.")
         return None
 
 
@@ -2610,7 +2782,7 @@ def _prototype_load_actions(caller, raw_inp, **kwargs):
         # which action to apply on the selection
         if action == "examine":
             # examine the prototype
-            prototype = protlib.search_prototype(key=prototype)[0]
+            prototype = _cached_search_prototype(caller, prototype)[0]
             txt = protlib.prototype_to_str(prototype)
             return "node_examine_entity", {"text": txt, "back": "prototype_load"}
         elif action == "delete":
@@ -2618,9 +2790,10 @@ def _prototype_load_actions(caller, raw_inp, **kwargs):
             try:
                 protlib.delete_prototype(prototype, caller=caller)
             except protlib.PermissionError as err:
-                txt = "|rDeletion error:|n {}".format(err)
+                txt = f"|rDeletion error:|n {err}"
             else:
-                txt = "|gPrototype {} was deleted.|n".format(prototype)
+                txt = f"|gPrototype {prototype} was deleted.|n"
+                _clear_prototype_cache(caller)
             return "node_examine_entity", {"text": txt, "back": "prototype_load"}
 
     return "node_prototype_load"
@@ -2651,6 +2824,34 @@ def node_prototype_load(caller, **kwargs):
 # EvMenu definition, formatting and access functions
 
 
+_OLC_KEYS = frozenset(
+    (
+        "index",
+        "forward",
+        "back",
+        "previous",
+        "next",
+        "validate prototype",
+        "save prototype",
+        "load prototype",
+        "spawn prototype",
+        "search objects",
+    )
+)
+
+
+@lru_cache(maxsize=256)
+def _raw_option_key(key):
+    """Get an option key without markup, for matching against `_OLC_KEYS`"""
+    return strip_ansi(key).lower()
+
+
+@lru_cache(maxsize=128)
+def _format_helptext(helptext):
+    """Format a node's help text. These are mostly static, so the result is cached"""
+    return "|c --- Help ---|n\n" + utils.dedent(helptext)
+
+
 class OLCMenu(EvMenu):
     """
     A custom EvMenu with a different formatting for the options.
@@ -2669,50 +2870,65 @@ class OLCMenu(EvMenu):
         Split the options into two blocks - olc options and normal options
 
         """
-        olc_keys = (
-            "index",
-            "forward",
-            "back",
-            "previous",
-            "next",
-            "validate prototype",
-            "save prototype",
-            "load prototype",
-            "spawn prototype",
-            "search objects",
-        )
         actioninfo = self.actioninfo + "\n" if hasattr(self, "actioninfo") else ""
         self.actioninfo = ""  # important, or this could bleed over to other nodes
         olc_options = []
         other_options = []
         for key, desc in optionlist:
-            raw_key = strip_ansi(key).lower()
-            if raw_key in olc_keys:
+            raw_key = _raw_option_key(key)
+            if raw_key in _OLC_KEYS:
                 desc = " {}".format(desc) if desc else ""
                 olc_options.append("|lc{}|lt{}|le{}".format(raw_key, key, desc))
             else:
                 other_options.append((key, desc))
 
-        olc_options = (
-            actioninfo + " |W|||n ".join(olc_options) + " |W|||n " + "|wQ|Wuit"
-            if olc_options
-            else ""
-        )
+        if olc_options:
+            olc_options.append("|wQ|Wuit")
+            olc_options = actioninfo + " |W|||n ".join(olc_options)
+        else:
+            olc_options = ""
         other_options = super(OLCMenu, self).options_formatter(other_options)
-        sep = "\n\n" if olc_options and other_options else ""
 
-        return "{}{}{}".format(olc_options, sep, other_options)
+        return "\n\n".join(part for part in (olc_options, other_options) if part)
 
     def helptext_formatter(self, helptext):
         """
         Show help text
         """
-        return "|c --- Help ---|n\n" + utils.dedent(helptext)
+        return _format_helptext(helptext)
 
     def display_helptext(self):
         evmore.msg(self.caller, self.helptext, session=self._session, exit_cmd="look")
 
 
+# the menu tree is never modified by EvMenu, so all menus can share it
+_MENUDATA = {
+    "node_index": node_index,
+    "node_validate_prototype": node_validate_prototype,
+    "node_examine_entity": node_examine_entity,
+    "node_search_object": node_search_object,
+    "node_prototype_key": node_prototype_key,
+    "node_prototype_parent": node_prototype_parent,
+    "node_typeclass": node_typeclass,
+    "node_key": node_key,
+    "node_aliases": node_aliases,
+    "node_attrs": node_attrs,
+    "node_tags": node_tags,
+    "node_locks": node_locks,
+    "node_permissions": node_permissions,
+    "node_location": node_location,
+    "node_home": node_home,
+    "node_destination": node_destination,
+    "node_apply_diff": node_apply_diff,
+    "node_prototype_desc": node_prototype_desc,
+    "node_prototype_tags": node_prototype_tags,
+    "node_prototype_locks": node_prototype_locks,
+    "node_prototype_load": node_prototype_load,
+    "node_prototype_save": node_prototype_save,
+    "node_prototype_spawn": node_prototype_spawn,
+}
+
+
 def start_olc(caller, session=None, prototype=None):
     """
     Start menu-driven olc system for prototypes.
@@ -2724,34 +2940,9 @@ def start_olc(caller, session=None, prototype=None):
             prototype rather than creating a new one.
 
     """
-    menudata = {
-        "node_index": node_index,
-        "node_validate_prototype": node_validate_prototype,
-        "node_examine_entity": node_examine_entity,
-        "node_search_object": node_search_object,
-        "node_prototype_key": node_prototype_key,
-        "node_prototype_parent": node_prototype_parent,
-        "node_typeclass": node_typeclass,
-        "node_key": node_key,
-        "node_aliases": node_aliases,
-        "node_attrs": node_attrs,
-        "node_tags": node_tags,
-        "node_locks": node_locks,
-        "node_permissions": node_permissions,
-        "node_location": node_location,
-        "node_home": node_home,
-        "node_destination": node_destination,
-        "node_apply_diff": node_apply_diff,
-        "node_prototype_desc": node_prototype_desc,
-        "node_prototype_tags": node_prototype_tags,
-        "node_prototype_locks": node_prototype_locks,
-        "node_prototype_load": node_prototype_load,
-        "node_prototype_save": node_prototype_save,
-        "node_prototype_spawn": node_prototype_spawn,
-    }
     OLCMenu(
         caller,
-        menudata,
+        _MENUDATA,
         startnode="node_index",
         session=session,
         olc_prototype=prototype,
@@ -665,11 +665,18 @@ def protfunc_parser(value, available_functions=None, testing=False, stacktrace=F
     if not isinstance(value, str):
         return value
 
-    available_functions = PROT_FUNCS if available_functions is None else available_functions
-
-    result = inlinefuncs.parse_inlinefunc(
-        value, available_funcs=available_functions, stacktrace=stacktrace, testing=testing, **kwargs
-    )
+    if "$" in value:
+        available_functions = PROT_FUNCS if available_functions is None else available_functions
+        result = inlinefuncs.parse_inlinefunc(
+            value,
+            available_funcs=available_functions,
+            stacktrace=stacktrace,
+            testing=testing,
+            **kwargs,
+        )
+    else:
+        # no protfuncs to parse, but the value may still be a Python literal
+        result = value
 
     err = None
     try:
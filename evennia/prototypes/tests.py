@@ -3,10 +3,12 @@ Unit tests for the prototypes and spawner
 
 """
 
+import time
 from random import randint
 import mock
 from anything import Something
 from django.test.utils import override_settings
+from evennia.utils import utils
 from evennia.utils.test_resources import EvenniaTest
 from evennia.utils.tests.test_evmenu import TestEvMenu
 from evennia.prototypes import spawner, prototypes as protlib
@@ -681,6 +683,16 @@ class TestMenuModule(EvenniaTest):
         self.assertEqual(
             olc_menus._format_option_value([1, 2, 3, "foo"], required=True), " (1, 2, 3, foo|n)"
         )
+        self.assertEqual(
+            olc_menus._format_option_value("a long value to crop"),
+            " ({}|n)".format(utils.crop("a long value to crop", width=olc_menus._MENU_CROP_WIDTH)),
+        )
+
+        _, options = olc_menus.node_index(caller)
+        self.assertEqual(
+            options[0], {"desc": "|WPrototype-Key|n (|runset|n)", "goto": "node_prototype_key"}
+        )
+        self.assertEqual(options[3], {"desc": "|wKey|n (TestKey|n)", "goto": "node_key"})
 
         self.assertEqual(
             olc_menus._set_property(
@@ -717,6 +729,54 @@ class TestMenuModule(EvenniaTest):
         self.assertEqual(olc_menus._default_parse("f3", choices, *actions), ("test3", "foo"))
         self.assertEqual(olc_menus._default_parse("f5", choices, *actions), (None, None))
 
+    def test_search_prototype_cache(self):
+
+        caller = self.caller
+
+        with mock.patch(
+            "evennia.prototypes.menus.protlib.search_prototype",
+            new=mock.MagicMock(return_value=[self.test_prot]),
+        ) as mock_search:
+            self.assertEqual(olc_menus._all_prototype_parents(caller), ["test_prot"])
+            self.assertEqual(olc_menus._all_prototype_parents(caller), ["test_prot"])
+            mock_search.assert_called_once_with(None)
+            olc_menus._clear_prototype_cache(caller)
+            self.assertEqual(olc_menus._all_prototype_parents(caller), ["test_prot"])
+            self.assertEqual(mock_search.call_count, 2)
+            # old results are re-fetched
+            later = time.monotonic() + olc_menus._PROTOTYPE_CACHE_TIMEOUT
+            with mock.patch("evennia.prototypes.menus.time.monotonic", return_value=later):
+                self.assertEqual(olc_menus._all_prototype_parents(caller), ["test_prot"])
+            self.assertEqual(mock_search.call_count, 3)
+
+    def test_validate_prototype_cache(self):
+
+        caller = self.caller
+
+        with mock.patch("evennia.prototypes.menus.spawner.spawn") as mock_spawn:
+            self.assertEqual(
+                olc_menus._validate_prototype(self.test_prot, caller), (False, Something)
+            )
+            self.assertEqual(
+                olc_menus._validate_prototype(self.test_prot, caller), (False, Something)
+            )
+            mock_spawn.assert_called_once()
+            olc_menus._set_menu_prototype(caller, self.test_prot)
+            prototype = olc_menus._set_prototype_value(caller, "key", "foo")
+            olc_menus._validate_prototype(prototype, caller)
+            self.assertEqual(mock_spawn.call_count, 2)
+            # going back to an earlier state re-uses its result
+            prototype = olc_menus._set_prototype_value(caller, "key", "bar")
+            olc_menus._validate_prototype(prototype, caller)
+            prototype = olc_menus._set_prototype_value(caller, "key", "foo")
+            olc_menus._validate_prototype(prototype, caller)
+            self.assertEqual(mock_spawn.call_count, 3)
+            # old results are re-calculated, since parents may have changed
+            later = time.monotonic() + olc_menus._PROTOTYPE_CACHE_TIMEOUT
+            with mock.patch("evennia.prototypes.menus.time.monotonic", return_value=later):
+                olc_menus._validate_prototype(prototype, caller)
+            self.assertEqual(mock_spawn.call_count, 4)
+
     def test_node_helpers(self):
 
         caller = self.caller
@@ -762,6 +822,16 @@ class TestMenuModule(EvenniaTest):
             new=mock.MagicMock(return_value={"foo": None, "bar": None}),
         ):
             self.assertEqual(olc_menus._all_typeclasses(caller), ["bar", "foo"])
+        with mock.patch(
+            "evennia.utils.utils.get_all_typeclasses",
+            new=mock.MagicMock(return_value={"foo": None, "baz": None, "bar": None}),
+        ):
+            # re-used for the rest of the menu session
+            self.assertEqual(olc_menus._all_typeclasses(caller), ["bar", "foo"])
+            # a new menu session sees typeclasses imported since
+            menutree, caller.ndb._menutree = caller.ndb._menutree, _MockMenu()
+            self.assertEqual(olc_menus._all_typeclasses(caller), ["bar", "baz", "foo"])
+            caller.ndb._menutree = menutree
 
         self.assertEqual(
             olc_menus._typeclass_select(caller, "evennia.objects.objects.DefaultObject"), None
@@ -799,6 +869,18 @@ class TestMenuModule(EvenniaTest):
                 ("test5", "123", "cat4", "set:true();edit:false()"),
             ],
         )
+        self.assertEqual(
+            olc_menus._add_attr(caller, "test2", delete=True), "Removed Attribute 'test2'"
+        )
+        self.assertEqual(
+            olc_menus._add_attr(caller, "test2", delete=True), "Attribute to delete not found."
+        )
+        self.assertEqual(olc_menus._add_attr(caller, "test4=foo4_changed"), Something)
+        self.assertEqual(
+            olc_menus._get_tup_by_attrname(caller, "test4"), ("test4", "foo4_changed", None, "")
+        )
+        olc_menus._add_attr(caller, "test4=foo4_changed_again")
+        self.assertEqual(len(olc_menus._get_menu_prototype(caller)["attrs"]), 4)
 
         # tag helpers
         self.assertEqual(olc_menus._caller_tags(caller), [])
@@ -850,6 +932,19 @@ class TestMenuModule(EvenniaTest):
         ):
             self.assertEqual(olc_menus._spawn(caller, prototype=self.test_prot), Something)
         obj = caller.contents[0]
+        caller.ndb._menutree.olc_spawn_context = {
+            "prototype": self.test_prot,
+            "locations": {"caller": caller},
+        }
+        self.assertEqual(olc_menus._spawn(caller, spawn_at="caller"), Something)
+        self.assertEqual(len(caller.contents), 2)
+        deleted_id = caller.contents[1].id
+        caller.contents[1].delete()
+        olc_menus._set_menu_prototype(caller, dict(self.test_prot, location=caller.location.dbref))
+        _, options = olc_menus.node_prototype_spawn(caller, already_validated=True)
+        gotos = [opt.get("goto") for opt in options]
+        self.assertIn(olc_menus._SPAWN_AT_LOCATION, gotos)
+        self.assertNotIn(olc_menus._SPAWN_AT_CALLER_LOCATION, gotos)
 
         self.assertEqual(obj.typeclass_path, "evennia.objects.objects.DefaultObject")
         self.assertEqual(
@@ -857,6 +952,11 @@ class TestMenuModule(EvenniaTest):
         )
 
         # update helpers
+        text, _ = olc_menus.node_apply_diff(
+            caller, prototype=self.test_prot, objects=[deleted_id], back_node="foo"
+        )
+        self.assertEqual(text, "There are no existing objects to update.")
+        self.assertEqual(olc_menus._get_spawned_ids(self.test_prot["prototype_key"]), [obj.id])
         self.assertEqual(
             olc_menus._apply_diff(caller, prototype=self.test_prot, back_node="foo", objects=[obj]),
             "foo",
@@ -866,6 +966,25 @@ class TestMenuModule(EvenniaTest):
             olc_menus._apply_diff(caller, prototype=self.test_prot, objects=[obj], back_node="foo"),
             "foo",
         )  # apply change to the one obj
+        self.test_prot["key"] = "updated key2"
+        self.assertEqual(
+            olc_menus._apply_diff(
+                caller, prototype=self.test_prot, objects=[obj.id], back_node="foo"
+            ),
+            "foo",
+        )  # objects may also be given by id
+        self.assertEqual(obj.key, "updated key2")
+        with mock.patch("evennia.prototypes.menus._UPDATE_BATCH_SIZE", 1), mock.patch(
+            "evennia.prototypes.menus.spawner.batch_update_objects_with_prototype", return_value=1
+        ) as mock_update:
+            olc_menus._apply_diff(
+                caller,
+                prototype=self.test_prot,
+                objects=[obj.id, obj.id],
+                diff={"key": "UPDATE"},
+                back_node="foo",
+            )
+            self.assertEqual(mock_update.call_count, 2)  # one call per batch
 
         # load helpers
         self.assertEqual(